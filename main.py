@@ -4,11 +4,26 @@
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 from datetime import timedelta
-import plotly.express as px
+import os
 import random
 import plotly.graph_objs as go
 
+try:
+    import polars as pl
+except ImportError:  # polars is optional
+    pl = None
+
+# parse CSVs and build daily totals with polars instead of pandas/pyarrow; opt in with USE_POLARS=1
+USE_POLARS = pl is not None and os.environ.get("USE_POLARS") == "1"
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pac
+except ImportError:  # pandas' C engine is used instead
+    pa = pac = None
+
 st.set_page_config(page_title="Electricity-usage visualiser", layout="wide")
 st.title("⚡ Electricity-usage visualiser, written using Streamlit")
 st.subheader("Initially created using GPT-o3 model, expanded without it by vidovb")
@@ -30,48 +45,216 @@ MODE = st.radio(
 # ────────────────────────────────────────────────
 # Common helper functions
 # ────────────────────────────────────────────────
-@st.cache_data(show_spinner=False)
-def parse_hourly(csv_file) -> pd.DataFrame:
-    """Return hourly rows <timestamp, kwh> for a single CSV."""
-    df = pd.read_csv(
-        csv_file,
-        sep=";",
-        decimal=",",
-        header=None,
-        names=["timestamp", "kwh"],
-        engine="python",
-        skiprows=4
+def file_key(csv_file):
+    """Return a cheap identity for a CSV: the path of a bundled file, or (name, size, file_id) of an upload."""
+    if isinstance(csv_file, str):
+        return csv_file
+    return csv_file.name, csv_file.size, getattr(csv_file, "file_id", None)
+
+
+# Key uploaded files by identity instead of hashing their whole contents on every rerun
+UPLOAD_HASH_FUNCS = {
+    "streamlit.runtime.uploaded_file_manager.UploadedFile": file_key,
+}
+
+
+def _parse_hourly_polars(csv_file) -> pd.DataFrame:
+    csv_options = dict(
+        separator=";",
+        decimal_comma=True,
+        skip_rows=4,  # the "Periood;..." row is read as the header and renamed
+        new_columns=["timestamp", "kwh"],
+        schema_overrides={"timestamp": pl.String, "kwh": pl.Float32},
+    )
+    # paths are scanned lazily; uploads are in-memory buffers and are read eagerly
+    if isinstance(csv_file, str):
+        frame = pl.scan_csv(csv_file, **csv_options)
+    else:
+        frame = pl.read_csv(csv_file, **csv_options)
+    frame = (
+        frame.with_columns(pl.col("timestamp").str.strptime(pl.Datetime("ms"), "%d.%m.%Y %H:%M", strict=False))
+        .drop_nulls("timestamp")
+        .sort("timestamp", maintain_order=True)
     )
-    mask = df["timestamp"].str.match(r"\d{2}\.\d{2}\.\d{4} \d{2}:\d{2}")
-    df = df[mask]
-    df["timestamp"] = pd.to_datetime(df["timestamp"], format="%d.%m.%Y %H:%M")
-    df["kwh"] = df["kwh"].astype(float)
-    return df.sort_values("timestamp").reset_index(drop=True)
+    if isinstance(frame, pl.LazyFrame):
+        frame = frame.collect()
+    df = frame.to_pandas()
+    df["timestamp"] = df["timestamp"].astype("datetime64[s]")
+    return df
+
+
+# pandas read_csv options shared by the C-engine reader and the chunked daily aggregation
+CSV_READ_OPTIONS = dict(
+    sep=";",
+    decimal=",",
+    header=None,
+    names=["timestamp", "kwh"],
+    dtype={"timestamp": str, "kwh": "float32"},  # readings have at most 3 decimals
+    skiprows=5,  # 4 metadata lines + the "Periood;..." header row
+)
+
+
+def _parse_timestamps(timestamps: pd.Series) -> pd.Series:
+    """Parse "dd.mm.yyyy HH:MM" strings to datetime64[s]; anything else (e.g. footers) becomes NaT."""
+    ts = timestamps.where(timestamps.str.len() == 16).str
+    # rearranged into ISO 8601, which is parsed in one vectorised pass instead of a per-row strptime
+    iso = ts.slice(6, 10) + "-" + ts.slice(3, 5) + "-" + ts.slice(0, 2) + "T" + ts.slice(11, 16)
+    return pd.to_datetime(iso, format="ISO8601", errors="coerce").astype("datetime64[s]")
+
+
+def _parse_hourly_pandas(csv_file) -> pd.DataFrame:
+    if pac is not None:
+        # Arrow's multithreaded reader straight over the file (or the upload's buffer), no extra pandas copy
+        source = csv_file if isinstance(csv_file, str) else pa.BufferReader(csv_file.getvalue())
+        df = pac.read_csv(
+            source,
+            read_options=pac.ReadOptions(skip_rows=5, column_names=["timestamp", "kwh"]),
+            parse_options=pac.ParseOptions(delimiter=";"),
+            convert_options=pac.ConvertOptions(
+                decimal_point=",",
+                column_types={"timestamp": pa.string(), "kwh": pa.float32()},
+            ),
+        ).to_pandas(self_destruct=True)
+    else:
+        df = pd.read_csv(csv_file, **CSV_READ_OPTIONS, engine="c", memory_map=isinstance(csv_file, str))
+    df["timestamp"] = _parse_timestamps(df["timestamp"])
+    df = df.dropna(subset=["timestamp"])
+    return df.sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+
+@st.cache_data(show_spinner=False, hash_funcs=UPLOAD_HASH_FUNCS)
+def parse_hourly(csv_file) -> pd.DataFrame:
+    """Return hourly rows <kwh, day, hour> for a single CSV, indexed by a sorted DatetimeIndex of timestamps."""
+    df = _parse_hourly_polars(csv_file) if USE_POLARS else _parse_hourly_pandas(csv_file)
+    # derive the calendar day and hour once here, so the views don't re-run .dt accessors
+    timestamps = df["timestamp"].to_numpy()
+    df["day"] = timestamps.astype("datetime64[D]")
+    df["hour"] = (timestamps.astype("datetime64[h]").astype("int64") % 24).astype("int8")
+    # both readers sort by timestamp, so the index is monotonic and supports binary-search slicing
+    return df.set_index("timestamp")
 
 
 @st.cache_data(show_spinner=False)
 def hourly_to_daily(hourly_df) -> pd.DataFrame:
+    # group on datetime64 day keys (int64 hash groupby), convert to dates only for the ~N/24 result rows
+    if USE_POLARS:
+        daily = (
+            pl.from_pandas(hourly_df[["day", "kwh"]])
+            .group_by_dynamic("day", every="1d")
+            .agg(pl.col("kwh").sum().cast(pl.Float64).round(3).alias("daily_kwh"))
+            .to_pandas()
+        )
+    else:
+        daily = (
+            hourly_df.groupby("day")["kwh"]
+            .sum()
+            .astype("float64")
+            .round(3)  # sums of 3-decimal readings; drops float32 accumulation noise
+            .rename("daily_kwh")
+            .reset_index()
+        )
+    daily.insert(0, "date", daily.pop("day").dt.date)
+    return daily
+
+
+# Files above ~100k rows are folded into daily totals chunk by chunk instead of being loaded whole
+LARGE_FILE_BYTES = 2_500_000
+CHUNK_ROWS = 200_000
+
+
+@st.cache_data(show_spinner=False, hash_funcs=UPLOAD_HASH_FUNCS)
+def parse_and_aggregate(csv_file) -> pd.DataFrame:
+    """Return daily rows <date, daily_kwh> for a single CSV, streaming large files so memory stays O(days)."""
+    size = os.path.getsize(csv_file) if isinstance(csv_file, str) else csv_file.size
+    if size <= LARGE_FILE_BYTES:
+        return hourly_to_daily(parse_hourly(csv_file))
+
+    totals = pd.Series(dtype="float64", index=pd.DatetimeIndex([], dtype="datetime64[s]"))
+    # the pyarrow engine does not support chunksize
+    for chunk in pd.read_csv(csv_file, **CSV_READ_OPTIONS, engine="c", chunksize=CHUNK_ROWS):
+        # malformed rows get a NaT day, which groupby drops
+        days = _parse_timestamps(chunk["timestamp"]).to_numpy().astype("datetime64[D]")
+        totals = totals.add(chunk["kwh"].groupby(days).sum().astype("float64"), fill_value=0.0)
+
+    totals = totals.sort_index().round(3)
+    return pd.DataFrame({"date": totals.index.date, "daily_kwh": totals.to_numpy()})
+
+
+def _week_reduce_numpy(values, period):
+    # segment reductions straight over the flat buffer (a trailing partial period is ignored)
+    n = len(values) // period
+    values = values[:n * period]
+    starts = np.arange(0, n * period, period)
     return (
-        hourly_df.assign(date=hourly_df["timestamp"].dt.date)
-        .groupby("date", as_index=False)["kwh"]
-        .sum()
-        .rename(columns={"kwh": "daily_kwh"})
+        np.add.reduceat(values, starts) / period,
+        np.minimum.reduceat(values, starts),
+        np.maximum.reduceat(values, starts),
     )
 
 
+@st.cache_resource(show_spinner=False)
+def get_week_reduce():
+    """Return a (values, period) -> (mean, min, max) reducer, JIT-compiled when numba is installed.
+
+    Kept as a resource so the kernel is compiled once per process, not on every script rerun.
+    """
+    try:
+        from numba import njit
+    except ImportError:  # numba is optional
+        return _week_reduce_numpy
+
+    @njit(fastmath=True)
+    def week_reduce(values, period):
+        # one pass, three reductions (a trailing partial period is ignored)
+        n = values.size // period
+        out_mean = np.empty(n)
+        out_min = np.empty(n)
+        out_max = np.empty(n)
+        for i in range(n):
+            total = 0.0
+            lo = values[i * period]
+            hi = lo
+            for j in range(period):
+                x = values[i * period + j]
+                total += x
+                lo = min(lo, x)
+                hi = max(hi, x)
+            out_mean[i] = total / period
+            out_min[i] = lo
+            out_max[i] = hi
+        return out_mean, out_min, out_max
+
+    return week_reduce
+
+
 @st.cache_data(show_spinner=False)
 def daily_to_weekly(daily_df) -> pd.DataFrame:
     # for simplicity assuming that first day of the week is monday (i.e. not real weeks but rather 7day periods)
-    output_df = pd.DataFrame(['date', 'weekly_kwh_avg', 'min', 'max'])
-    for i in range(0, len(daily_df) // 7):
-        date = daily_df.iloc[i * 7]["date"]
-        sum_weekly = sum(daily_df.iloc[i * 7:(i + 1) * 7]["daily_kwh"])
-        output_df.at[i, "date"] = date
-        output_df.at[i, "weekly_kwh_avg"] = round(sum_weekly / 7, 2)
-        output_df.at[i, "min"] = float(min(daily_df.iloc[i * 7:(i + 1) * 7]["daily_kwh"]))
-        output_df.at[i, "max"] = float(max(daily_df.iloc[i * 7:(i + 1) * 7]["daily_kwh"]))
+    values = np.ascontiguousarray(daily_df["daily_kwh"].to_numpy(dtype="float64"))
+    avg, lo, hi = get_week_reduce()(values, 7)
+    return pd.DataFrame({
+        "date": daily_df["date"].to_numpy()[:len(avg) * 7:7],
+        "weekly_kwh_avg": avg.round(2),
+        "min": lo,
+        "max": hi,
+    })
 
-    return output_df
+
+@st.cache_data(show_spinner=False)
+def build_hourly_pivot(file_keys, _hourly_dict) -> pd.DataFrame:
+    """Return kWh indexed by <day, hour> with one column per file (NaN where a file has no reading).
+
+    Cached on `file_keys` (see file_key) only; the parsed frames in `_hourly_dict` are not hashed.
+    """
+    combined = pd.concat(
+        [df.assign(source=name) for name, df in _hourly_dict.items()], ignore_index=True
+    )
+    # DST fall-back repeats an hour; those readings are summed
+    return (
+        combined.pivot_table(index=["day", "hour"], columns="source", values="kwh", aggfunc="sum")
+        .reindex(columns=list(_hourly_dict))
+        .rename_axis(columns=None)
+    )
 
 
 path = "/electricity/.csv"
@@ -79,8 +262,13 @@ path = "/electricity/.csv"
 default_file_hashes = ["9e9dca492a061e211740838882", "94a4157616804ae51743754974", "c2a91e3d7222f6d51743069686",
                        "c550bcace2429c281741504217", "ed9f4fcf0bfb1afa1741424674", "fe2b07c1f38b5cb91743699228"]
 default_file_path = random.choice(default_file_hashes)
-default_multiple_files_paths = {csv_file_name: parse_hourly("electricity/" + csv_file_name + ".csv") for csv_file_name
-                                in default_file_hashes}
+
+
+@st.cache_resource(show_spinner=False)
+def load_default_files() -> dict:
+    """Parse the bundled CSVs, only once and only when a view actually needs all of them."""
+    return {csv_file_name: parse_hourly(f"electricity/{csv_file_name}.csv") for csv_file_name in default_file_hashes}
+
 
 # ────────────────────────────────────────────────
 # MODE 1  –  100-day rolling window (single file)
@@ -93,11 +281,9 @@ if MODE == "100-day window (single file)":
         st.info(f"Using default CSV with hash {default_file_path}.")
 
     if file:
-        hourly = parse_hourly(file)
+        daily = parse_and_aggregate(file)
     else:
-        hourly = parse_hourly(f"electricity/{default_file_path}.csv")
-
-    daily = hourly_to_daily(hourly)
+        daily = parse_and_aggregate(f"electricity/{default_file_path}.csv")
 
     st.success(
         f"Loaded **{len(daily)} days** "
@@ -105,8 +291,9 @@ if MODE == "100-day window (single file)":
     )
 
     WINDOW = 100
-    min_day = daily["date"].min()
-    max_day = daily["date"].max() - timedelta(days=WINDOW - 1)
+    # daily is sorted by date, so the bounds are its first and last rows
+    min_day = daily["date"].iloc[0]
+    max_day = daily["date"].iloc[-1] - timedelta(days=WINDOW - 1)
 
     start_day = st.date_input(
         "First day of the 100-day window",
@@ -116,7 +303,10 @@ if MODE == "100-day window (single file)":
     )
 
     end_day = start_day + timedelta(days=WINDOW - 1)
-    window_df = daily[(daily["date"] >= start_day) & (daily["date"] <= end_day)]
+    # daily is sorted by date, so the window is a contiguous slice
+    lo = daily["date"].searchsorted(start_day)
+    hi = daily["date"].searchsorted(end_day, side="right")
+    window_df = daily.iloc[lo:hi]
 
     st.subheader(f"Daily kWh  —  {start_day} → {end_day}")
     st.line_chart(window_df.set_index("date")["daily_kwh"], height=450)
@@ -137,35 +327,34 @@ elif MODE == "Compare one day across multiple files":
 
     if files:
         hourly_dict = {f.name: parse_hourly(f) for f in files}
+        file_keys = tuple(file_key(f) for f in files)
     else:
-        hourly_dict = default_multiple_files_paths
+        hourly_dict = load_default_files()
+        file_keys = tuple(default_file_hashes)
+
+    hourly_pivot = build_hourly_pivot(file_keys, hourly_dict)
 
     # Determine the union of available dates
-    all_dates = set()
-    for df in hourly_dict.values():
-        all_dates |= set(df["timestamp"].dt.date.unique())
+    all_days = np.unique(np.concatenate([df["day"].to_numpy() for df in hourly_dict.values()]))
+    min_day, max_day = all_days[[0, -1]].astype("datetime64[D]").astype("O")
     date_choice = st.date_input(
         "Pick a calendar date to compare",
-        value=min(all_dates),
-        min_value=min(all_dates),
-        max_value=max(all_dates),
+        value=min_day,
+        min_value=min_day,
+        max_value=max_day,
     )
 
     # Build a DataFrame with rows = hour 0-23, columns = file names
+    try:
+        day_df = hourly_pivot.loc[pd.Timestamp(date_choice)]
+    except KeyError:
+        day_df = hourly_pivot.iloc[:0].droplevel("day")
+    missing = [name for name in day_df.columns if day_df[name].isna().all()]
+    for name in missing:
+        st.warning(f"⚠️  {name} has **no data** for {date_choice}")
+    # Ensure exactly 24 hours (some meters omit zeros)
     hour_index = pd.Index(range(24), name="hour")
-    comparison_df = pd.DataFrame(index=hour_index)
-
-    for name, df in hourly_dict.items():
-        day_slice = df[df["timestamp"].dt.date == date_choice]
-        if day_slice.empty:
-            st.warning(f"⚠️  {name} has **no data** for {date_choice}")
-            continue
-        # Ensure exactly 24 hours (some meters omit zeros)
-        day_slice = (
-            day_slice.set_index(day_slice["timestamp"].dt.hour)["kwh"]
-            .reindex(hour_index, fill_value=0.0)
-        )
-        comparison_df[name] = day_slice
+    comparison_df = day_df.drop(columns=missing).reindex(hour_index).fillna(0.0)
 
     if comparison_df.empty:
         st.error("No datasets contained that date.")
@@ -193,25 +382,33 @@ elif MODE == "Heatmap (all days)":
         st.info(f"Using default CSV with hash {default_file_path}.")
 
     if file:
-        hourly = parse_hourly(file)
+        daily = parse_and_aggregate(file)
     else:
-        hourly = parse_hourly(f"electricity/{default_file_path}.csv")
-
-    daily = hourly_to_daily(hourly)
+        daily = parse_and_aggregate(f"electricity/{default_file_path}.csv")
 
     st.success(
         f"Loaded **{len(daily)} days** "
         f"({daily['date'].iloc[0]} → {daily['date'].iloc[-1]})."
     )
 
-    min_day = daily["date"].min()
-    max_day = daily["date"].max()
-
     window_df = daily
     window_df.index = daily["date"]
 
-    fig = px.density_heatmap(window_df["daily_kwh"], y="daily_kwh", nbinsx=300, nbinsy=20,
-                             color_continuous_scale=["blue", "lightblue", "yellow", "orange", "red"])
+    # bin server-side so only the 300x20 grid of counts is sent to the browser, not every day
+    day_numbers = window_df["date"].to_numpy().astype("datetime64[D]").astype("int64")
+    first, last = day_numbers[0], day_numbers[-1]
+    # whole-day date bins (at most 300), so every column covers the same number of days
+    width = -(-(last - first + 1) // 300)
+    x_edges = np.arange(first, last + width + 1, width)
+    counts, x_edges, y_edges = np.histogram2d(day_numbers, window_df["daily_kwh"].to_numpy(), bins=[x_edges, 20])
+    fig = go.Figure(go.Heatmap(
+        z=counts.T,
+        x=x_edges[:-1].astype("int64").astype("datetime64[D]"),
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        colorscale=["blue", "lightblue", "yellow", "orange", "red"],
+        colorbar=dict(title="count"),
+    ))
+    fig.update_layout(xaxis_title="date", yaxis_title="daily_kwh")
 
     st.subheader(f"Heatmap of energy usage")
     st.plotly_chart(fig, height=500)
@@ -232,11 +429,9 @@ elif MODE == "Min-max bands (weekly average)":
         st.info(f"Using default CSV with hash {default_file_path}.")
 
     if file:
-        hourly = parse_hourly(file)
+        daily = parse_and_aggregate(file)
     else:
-        hourly = parse_hourly(f"electricity/{default_file_path}.csv")
-
-    daily = hourly_to_daily(hourly)
+        daily = parse_and_aggregate(f"electricity/{default_file_path}.csv")
     weekly = daily_to_weekly(daily)
 
     st.success(